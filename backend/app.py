@@ -1,57 +1,101 @@
 """
-Flask-SocketIO server for AR Solar System Hologram
+Async Socket.IO server for AR Solar System Hologram
 Handles WebSocket communication, camera streaming, and gesture data transmission
 """
 
-from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
-import cv2
-import base64
-import threading
+import asyncio
+import os
+import struct
 import time
-from hand_tracker import HandTracker
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import socketio
+import uvicorn
+from camera_grabber import CameraGrabber
+from hand_tracker import MODEL_PATH, HandTracker
 from gesture_recognizer import GestureRecognizer
 
-# Configure Flask to serve frontend files
+# libjpeg-turbo (SIMD) encoder for the preview; falls back to cv2.imencode if unavailable
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError) as e:
+    print(f"TurboJPEG unavailable, using OpenCV JPEG encoder: {e}")
+    turbo_jpeg = None
+
+# Configure static file serving for the frontend
 # Get the parent directory (project root)
-import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 frontend_path = os.path.join(project_root, 'frontend')
 
-app = Flask(__name__, 
-            static_folder=frontend_path,
-            static_url_path='',
-            template_folder=frontend_path)
-app.config['SECRET_KEY'] = 'solar-system-ar-secret-key'
-# Optimize SocketIO for performance
-socketio = SocketIO(
-    app, 
-    cors_allowed_origins="*", 
-    async_mode='threading',
+# Optimize SocketIO for performance (asyncio event loop instead of threads)
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins="*",
     ping_timeout=10,
     ping_interval=5,
-    max_http_buffer_size=1e8,  # 100MB buffer for large frames
+    max_http_buffer_size=100_000_000,  # 100MB buffer for large frames
     allow_upgrades=True,
     transports=['websocket', 'polling']  # Allow both but prefer websocket
 )
+app = socketio.ASGIApp(sio, static_files={
+    '/': os.path.join(frontend_path, 'index.html'),
+    '/css': os.path.join(frontend_path, 'css'),
+    '/js': os.path.join(frontend_path, 'js'),
+})
 
 # Global variables
 hand_tracker = None
 gesture_recognizer = None
 camera = None
+camera_grabber = None
 is_streaming = False
-stream_thread = None
+stream_task = None
+
+# Dedicated executors per pipeline stage so capture, MediaPipe and JPEG encode don't contend
+# (single worker each: stages are stateful and must stay in frame order)
+capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='capture')
+infer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='infer')
+encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+
+# Pipeline queue depth (small to keep latency low; oldest frames are dropped when full)
+pipeline_queue_size = 2
+# Outgoing message queue depth; the sender drains whatever is queued into one 'batch' event
+# (in practice one camera_frame, plus the 1 Hz performance message when it is due)
+send_queue_size = 8
+
+# Backpressure: skip the preview JPEG encode while any client's engine.io send queue is
+# backed up (landmarks/gestures are tiny and always get through). Each 'batch' event is one
+# text packet plus one binary packet for the frame payload, so this is about two pending batches
+backpressure_queue_threshold = 4  # Packets waiting in a socket's send queue
+
+# Hand landmarker model bundle, read at startup; point it at a heavier model
+# only when the CPU has headroom (default is the float16 hand_landmarker.task)
+hand_model_path = os.environ.get('HAND_MODEL_PATH', MODEL_PATH)
+
+# Pre-allocated per-stage frame buffers (each stage has a single-worker executor, so reuse is safe)
+frame_buffers = {}
 
 # Performance monitoring
 fps_counter = 0
-last_fps_time = time.time()
-frame_times = []
+last_fps_time = time.monotonic()
+frame_times = deque(maxlen=60)  # Last 60 frame latencies (old entries drop off in O(1))
 
 
 def init_camera():
     """Initialize camera with optimized settings for high FPS"""
-    global camera
+    global camera, camera_grabber
     try:
+        # Shut down the previous grabber before its handle is released and the device reopened
+        if camera_grabber:
+            camera_grabber.stop()
+            camera_grabber.join()
+            camera_grabber = None
+        if camera:
+            camera.release()
         camera = cv2.VideoCapture(0)
         # Set higher FPS capability
         camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
@@ -61,6 +105,9 @@ def init_camera():
         camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimal buffer for low latency
         if not camera.isOpened():
             raise Exception("Camera not available")
+        # Many drivers ignore BUFFERSIZE, so drain the buffer on a dedicated thread
+        camera_grabber = CameraGrabber(camera)
+        camera_grabber.start()
         return True
     except Exception as e:
         print(f"Camera initialization error: {e}")
@@ -71,167 +118,336 @@ def init_hand_tracking():
     """Initialize MediaPipe hand tracking"""
     global hand_tracker, gesture_recognizer
     try:
-        # Use Lite model (0) for generic laptop CPU
-        hand_tracker = HandTracker(model_complexity=0)
+        # MediaPipe Tasks HandLandmarker on the XNNPACK CPU delegate
+        hand_tracker = HandTracker(model_path=hand_model_path)
         gesture_recognizer = GestureRecognizer()
-        print("Hand tracking initialized with Lite model")
+        print("Hand tracking initialized with HandLandmarker (CPU/XNNPACK)")
         return True
     except Exception as e:
         print(f"Hand tracking initialization error: {e}")
         return False
 
 
-def stream_camera():
-    """Stream camera feed and hand tracking data via WebSocket - OPTIMIZED FOR 60 FPS"""
-    global is_streaming, fps_counter, last_fps_time, frame_times
+def frame_buffer(name, size):
+    """
+    Get a reusable uint8 image buffer, allocating it only when the size changes
     
-    if not camera or not camera.isOpened():
-        socketio.emit('error', {'message': 'Camera not available'})
-        return
+    Args:
+        name: Buffer name (one per pipeline use)
+        size: (width, height) of the buffer
+        
+    Returns:
+        (height, width, 3) uint8 array
+    """
+    width, height = size
+    buffer = frame_buffers.get(name)
+    if buffer is None or buffer.shape[:2] != (height, width):
+        buffer = frame_buffers[name] = np.empty((height, width, 3), dtype=np.uint8)
+    return buffer
+
+
+def track_frame(frame, ai_size):
+    """
+    Run the blocking inference work: resize, mirror, hand tracking and gesture recognition
+    (every other frame is extrapolated while tracking is confident)
     
-    # Target 60 FPS
-    target_fps = 60
-    frame_time = 1.0 / target_fps
+    Args:
+        frame: BGR camera frame (high res, not mirrored)
+        ai_size: (width, height) of the frame fed to MediaPipe
+        
+    Returns:
+        Tuple of (hand_labels, landmark_bytes, gesture_data)
+    """
+    if hand_tracker.should_skip_detection():
+        # Confident tracking: extrapolate this frame instead of running MediaPipe
+        hands_data = hand_tracker.extrapolate_landmarks()
+    else:
+        # Prepare AI Frame (Resize is fast)
+        # Resize to small resolution first so the full-res frame is only touched once
+        # Area averaging avoids nearest-neighbor aliasing that causes palm re-detections; two
+        # exact 2x halvings hit OpenCV's fast INTER_AREA path (~0.4ms vs ~1.1ms for one 4x step)
+        half_size = (ai_size[0] * 2, ai_size[1] * 2)
+        ai_half = cv2.resize(frame, half_size, dst=frame_buffer('ai_half', half_size), interpolation=cv2.INTER_AREA)
+        ai_bgr = cv2.resize(ai_half, ai_size, dst=frame_buffer('ai_bgr', ai_size), interpolation=cv2.INTER_AREA)
+        
+        # Mirror + BGR->RGB on the small frame into reused buffers (both SIMD in OpenCV;
+        # ~3x faster than a NumPy negative-stride copy doing the same in one pass)
+        ai_mirror = cv2.flip(ai_bgr, 1, dst=frame_buffer('ai_mirror', ai_size))
+        ai_rgb = cv2.cvtColor(ai_mirror, cv2.COLOR_BGR2RGB, dst=frame_buffer('ai_rgb', ai_size))
+        
+        # Process Hand Tracking (on Small Frame)
+        # MediaPipe is 10x faster on 320x180 than 1280x720
+        results = hand_tracker.process_rgb(ai_rgb)
+        hands_data = hand_tracker.get_landmarks(results)
     
-    # AI Processing Resolution (Low Res for Efficiency)
-    # Using 16:9 aspect ratio to match camera (1280x720) -> 320x180
-    ai_width = 320
-    ai_height = 180
+    # Recognize Gestures (directly on the NumPy landmark arrays)
+    gesture_data = None
+    if hands_data and len(hands_data) > 0:
+        gesture_data = gesture_recognizer.recognize(hands_data)
     
-    # Preview Settings
-    preview_frame_skip = 2  # Send preview every 2nd frame (30 FPS video, 60 FPS tracking)
-    frame_counter = 0
-    preview_width = 480
-    preview_height = 270
+    # Quantize landmarks only at the emit boundary
+    hand_labels, landmark_bytes = HandTracker.serialize(hands_data)
     
-    print(f"Starting optimized stream: Camera=1280x720, AI={ai_width}x{ai_height}, Target FPS={target_fps}")
+    return hand_labels, landmark_bytes, gesture_data
+
+
+def encode_preview(frame, preview_size):
+    """
+    Resize, mirror and JPEG-encode the preview frame
+    
+    Args:
+        frame: BGR camera frame (high res, not mirrored)
+        preview_size: (width, height) of the JPEG preview
+        
+    Returns:
+        JPEG bytes (sent inside the binary frame payload, no base64)
+    """
+    # Resize for visual preview, then mirror the small frame into a reused buffer
+    resized = cv2.resize(frame, preview_size, dst=frame_buffer('preview', preview_size),
+                         interpolation=cv2.INTER_LINEAR)
+    preview_frame = cv2.flip(resized, 1, dst=frame_buffer('preview_mirror', preview_size))
+    
+    # Smart Compression
+    # Increase quality slightly since we have more CPU headroom now
+    if turbo_jpeg:
+        return turbo_jpeg.encode(preview_frame, quality=70, pixel_format=TJPF_BGR)
+    
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, 70]
+    _, buffer = cv2.imencode('.jpg', preview_frame, encode_params)
+    return buffer.tobytes()
+
+
+def pack_frame_payload(hand_count, landmark_bytes, jpeg):
+    """
+    Pack landmarks and the preview JPEG into a single binary attachment
+    (one WebSocket binary message per frame instead of one per buffer)
+    
+    Args:
+        hand_count: Number of hands in landmark_bytes
+        landmark_bytes: int16 landmark block from HandTracker.serialize
+        jpeg: Preview JPEG bytes, or b'' when no preview is sent this frame
+        
+    Returns:
+        bytes: uint16 hand count, int16 landmark block, then the JPEG
+    """
+    return b''.join((struct.pack('<H', hand_count), landmark_bytes, jpeg))
+
+
+def put_latest(queue, item):
+    """Put item on a bounded queue, dropping the oldest entry if full (keeps latency low)"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+async def capture_stage(frame_queue, frame_time):
+    """Pipeline stage 1: read camera frames and hand them to inference"""
+    loop = asyncio.get_running_loop()
+    
+    # Absolute-deadline scheduling on the monotonic clock (no drift, immune to wall-clock jumps)
+    next_tick = time.monotonic()
     
     while is_streaming:
-        start_time = time.time()
+        start_time = time.monotonic()
         
-        # 1. Capture Frame (High Res)
-        ret, frame = camera.read()
+        # Capture Frame (High Res) - newest frame from the grabber thread, waited on in its own executor
+        ret, frame = await loop.run_in_executor(capture_executor, camera_grabber.read)
         if not ret:
+            await asyncio.sleep(0)
             continue
         
-        # Flip immediately (mirror effect)
-        frame = cv2.flip(frame, 1)
-        
-        # 2. Prepare AI Frame (Resize is fast)
-        # Resize to small resolution for MediaPipe (this is the key optimization)
-        ai_frame = cv2.resize(frame, (ai_width, ai_height), interpolation=cv2.INTER_NEAREST)
+        put_latest(frame_queue, (start_time, frame))
         
-        # 3. Process Hand Tracking (on Small Frame)
-        # MediaPipe is 10x faster on 320x180 than 1280x720
-        results = hand_tracker.process(ai_frame)
-        landmarks = hand_tracker.get_landmarks(results)
-        
-        # 4. Recognize Gestures
-        gesture_data = None
-        if landmarks and len(landmarks) > 0:
-            gesture_data = gesture_recognizer.recognize(landmarks)
-        
-        # 5. Send Preview Frame (Throttled)
-        frame_base64 = None
-        if frame_counter % preview_frame_skip == 0:
-            # Resize for visual preview
-            preview_frame = cv2.resize(frame, (preview_width, preview_height), interpolation=cv2.INTER_LINEAR)
-            
-            # Smart Compression
-            # Increase quality slightly since we have more CPU headroom now
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, 70]
-            _, buffer = cv2.imencode('.jpg', preview_frame, encode_params)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+        # Sleep until the next frame deadline (always yields to the event loop)
+        next_tick += frame_time
+        now = time.monotonic()
+        if next_tick < now - frame_time:
+            # Fell more than a frame behind: re-anchor instead of bursting to catch up
+            next_tick = now
+        await asyncio.sleep(max(0, next_tick - now))
+
+
+async def infer_stage(frame_queue, emit_queue, ai_size):
+    """Pipeline stage 2: hand tracking and gesture recognition"""
+    loop = asyncio.get_running_loop()
+    
+    while True:
+        captured_at, frame = await frame_queue.get()
+        hand_labels, landmark_bytes, gesture_data = await loop.run_in_executor(
+            infer_executor, track_frame, frame, ai_size
+        )
+        put_latest(emit_queue, (captured_at, frame, hand_labels, landmark_bytes, gesture_data))
+
+
+def send_backlog():
+    """
+    Deepest engine.io send queue across connected clients
+    
+    sio.emit only enqueues packets; each socket's writer task drains its queue onto the
+    WebSocket, so a growing queue is the signal that a client can't keep up.
+    
+    Returns:
+        Number of packets waiting to be written to the slowest client
+    """
+    return max((socket.queue.qsize() for socket in sio.eio.sockets.values()), default=0)
+
+
+async def emit_stage(emit_queue, send_queue, preview_size, preview_frame_skip):
+    """Pipeline stage 3: encode the (throttled) preview and queue messages for the sender"""
+    global fps_counter, last_fps_time
+    loop = asyncio.get_running_loop()
+    frame_counter = 0
+    
+    while True:
+        captured_at, frame, hand_labels, landmark_bytes, gesture_data = await emit_queue.get()
         
-        # 6. Compose & Emit Data
+        # Compose & Emit Data
         data = {
-            'landmarks': landmarks,
+            'hands': hand_labels,
             'gesture': gesture_data,
             'timestamp': time.time(),
         }
         
-        if frame_base64:
-            data['frame'] = f'data:image/jpeg;base64,{frame_base64}'
-            
-        socketio.emit('camera_frame', data, namespace='/')
+        # Send Preview Frame (Throttled, and dropped entirely while the client is backpressured)
+        jpeg = b''
+        if frame_counter % preview_frame_skip == 0 and send_backlog() <= backpressure_queue_threshold:
+            jpeg = await loop.run_in_executor(
+                encode_executor, encode_preview, frame, preview_size
+            )
+        
+        # Landmarks and JPEG share one binary attachment; frames with neither stay text-only
+        if hand_labels or jpeg:
+            data['payload'] = pack_frame_payload(len(hand_labels), landmark_bytes, jpeg)
+        
+        put_latest(send_queue, {'event': 'camera_frame', 'data': data})
         
         frame_counter += 1
         
-        # 7. FPS Calculation & Governance
-        elapsed = time.time() - start_time
+        # FPS Calculation (latency is capture -> emit)
+        elapsed = time.monotonic() - captured_at
         frame_times.append(elapsed)
-        if len(frame_times) > 60:
-            frame_times.pop(0)
-            
+        
         fps_counter += 1
-        current_time = time.time()
+        current_time = time.monotonic()
         if current_time - last_fps_time >= 1.0:
             avg_fps = fps_counter / (current_time - last_fps_time)
             avg_latency = sum(frame_times) / len(frame_times) * 1000 if frame_times else 0
             
-            socketio.emit('performance', {
+            # Queued right behind the frame so the sender coalesces both into one batch
+            put_latest(send_queue, {'event': 'performance', 'data': {
                 'fps': round(avg_fps, 1),
                 'latency': round(avg_latency, 1)
-            })
+            }})
             fps_counter = 0
             last_fps_time = current_time
-            
-        # Precise Sleep to prevent CPU spinning if we are too fast
-        sleep_time = max(0, frame_time - elapsed)
-        if sleep_time > 0:
-            # time.sleep is not precise enough for high FPS, but `socketio.sleep` yields to other threads
-            socketio.sleep(sleep_time)
-        else:
-            socketio.sleep(0) # Yield
 
 
-@socketio.on('connect')
-def handle_connect():
+async def sender_stage(send_queue):
+    """
+    Drain all queued messages and send them as a single 'batch' event
+    
+    sio.emit only enqueues on engine.io, so the sender keeps up with the emit stage and
+    each batch holds one camera_frame; batching merges the performance message into it
+    rather than reducing the per-frame event rate.
+    """
+    while True:
+        batch = [await send_queue.get()]
+        while not send_queue.empty():
+            batch.append(send_queue.get_nowait())
+        await sio.emit('batch', batch, namespace='/')
+
+
+async def stream_camera():
+    """
+    Stream camera feed and hand tracking data via WebSocket - OPTIMIZED FOR 60 FPS
+    
+    Runs capture, inference and emit as three pipelined stages so frame N capture
+    overlaps with frame N-1 inference and frame N-2 encode/emit. A sender task
+    emits queued messages as 'batch' events (one per frame, performance included).
+    """
+    if not camera or not camera.isOpened():
+        await sio.emit('error', {'message': 'Camera not available'})
+        return
+    
+    # Target 60 FPS
+    target_fps = 60
+    frame_time = 1.0 / target_fps
+    
+    # AI Processing Resolution (Low Res for Efficiency)
+    # Using 16:9 aspect ratio to match camera (1280x720) -> 320x180
+    ai_width = 320
+    ai_height = 180
+    
+    # Preview Settings
+    preview_frame_skip = 2  # Send preview every 2nd frame (30 FPS video, 60 FPS tracking)
+    preview_width = 480
+    preview_height = 270
+    
+    print(f"Starting optimized stream: Camera=1280x720, AI={ai_width}x{ai_height}, Target FPS={target_fps}")
+    
+    frame_queue = asyncio.Queue(maxsize=pipeline_queue_size)
+    emit_queue = asyncio.Queue(maxsize=pipeline_queue_size)
+    send_queue = asyncio.Queue(maxsize=send_queue_size)
+    tasks = [
+        asyncio.create_task(capture_stage(frame_queue, frame_time)),
+        asyncio.create_task(infer_stage(frame_queue, emit_queue, (ai_width, ai_height))),
+        asyncio.create_task(emit_stage(emit_queue, send_queue, (preview_width, preview_height), preview_frame_skip)),
+        asyncio.create_task(sender_stage(send_queue)),
+    ]
+    
+    # Capture stage returns when streaming stops; a failing stage also ends the pipeline
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                print(f"Stream pipeline error: {result}")
+
+
+@sio.event
+async def connect(sid, environ):
     """Handle client connection"""
     print('Client connected')
-    emit('connected', {'status': 'ok'})
+    await sio.emit('connected', {'status': 'ok'}, to=sid)
 
 
-@socketio.on('disconnect')
-def handle_disconnect():
+@sio.event
+async def disconnect(sid):
     """Handle client disconnection"""
     print('Client disconnected')
 
 
-@socketio.on('start_stream')
-def handle_start_stream():
+@sio.event
+async def start_stream(sid):
     """Start camera streaming"""
-    global is_streaming, stream_thread
+    global is_streaming, stream_task
+    loop = asyncio.get_running_loop()
     
     if not camera or not camera.isOpened():
-        if not init_camera():
-            emit('error', {'message': 'Failed to initialize camera'})
+        if not await loop.run_in_executor(None, init_camera):
+            await sio.emit('error', {'message': 'Failed to initialize camera'}, to=sid)
             return
     
     if not hand_tracker:
-        if not init_hand_tracking():
-            emit('error', {'message': 'Failed to initialize hand tracking'})
+        if not await loop.run_in_executor(None, init_hand_tracking):
+            await sio.emit('error', {'message': 'Failed to initialize hand tracking'}, to=sid)
             return
     
     if not is_streaming:
         is_streaming = True
-        stream_thread = threading.Thread(target=stream_camera, daemon=True)
-        stream_thread.start()
-        emit('stream_started', {'status': 'ok'})
+        stream_task = sio.start_background_task(stream_camera)
+        await sio.emit('stream_started', {'status': 'ok'}, to=sid)
 
 
-@socketio.on('stop_stream')
-def handle_stop_stream():
+@sio.event
+async def stop_stream(sid):
     """Stop camera streaming"""
     global is_streaming
     is_streaming = False
-    emit('stream_stopped', {'status': 'ok'})
-
-
-@app.route('/')
-def index():
-    """Serve main HTML page"""
-    return render_template('index.html')
+    await sio.emit('stream_stopped', {'status': 'ok'}, to=sid)
 
 
 if __name__ == '__main__':
@@ -250,5 +466,6 @@ if __name__ == '__main__':
     
     # Run server
     print("Starting server on http://localhost:5000")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
-
+    # uvicorn negotiates permessage-deflate by default, so the JSON part of each batch is compressed
+    # (the binary frame payload is deflated too: neither websockets nor socketio can exclude it)
+    uvicorn.run(app, host='0.0.0.0', port=5000, log_level='warning')
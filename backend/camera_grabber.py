@@ -0,0 +1,83 @@
+"""
+Camera Grabber Module
+Drains the camera driver buffer on a dedicated thread so reads always return the newest frame
+"""
+
+import threading
+import time
+
+
+class CameraGrabber(threading.Thread):
+    """Continuously grab camera frames and decode only the latest one on demand"""
+    
+    def __init__(self, capture):
+        """
+        Initialize grabber thread
+        
+        Args:
+            capture: Opened cv2.VideoCapture instance
+        """
+        super().__init__(daemon=True, name='camera-grabber')
+        self.capture = capture
+        
+        # Latest decoded frame slot (guarded by lock)
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.latest = None
+        self.frame_id = 0
+        
+        # Set by read() when a consumer is waiting for a frame
+        self.retrieve_requested = False
+        self.running = False
+    
+    def start(self):
+        """Start grabbing frames"""
+        self.running = True
+        super().start()
+    
+    def run(self):
+        """Grab every frame (cheap, drains driver buffer) but only retrieve/decode when requested"""
+        while self.running:
+            ok = self.capture.grab()
+            if not ok:
+                time.sleep(0.005)  # Avoid spinning if the camera stalls
+                continue
+            
+            if not self.retrieve_requested:
+                continue
+            
+            ok, frame = self.capture.retrieve()
+            if not ok:
+                continue
+            
+            # retrieve() allocates a fresh array, so the slot can be handed out without copying
+            with self.lock:
+                self.latest = frame
+                self.frame_id += 1
+                self.retrieve_requested = False
+                self.frame_ready.notify_all()
+    
+    def read(self, timeout=1.0):
+        """
+        Block until the next freshly grabbed frame is available
+        
+        Args:
+            timeout: Maximum seconds to wait for a frame
+            
+        Returns:
+            Tuple of (success, frame) like cv2.VideoCapture.read
+        """
+        with self.lock:
+            last_id = self.frame_id
+            self.retrieve_requested = True
+            if not self.frame_ready.wait_for(lambda: self.frame_id != last_id or not self.running, timeout):
+                return False, None
+            if self.frame_id == last_id:
+                return False, None
+            return True, self.latest
+    
+    def stop(self):
+        """Stop grabbing and wake any waiting readers"""
+        self.running = False
+        with self.lock:
+            self.frame_ready.notify_all()
@@ -3,7 +3,134 @@ Gesture Recognition Module
 Recognizes hand gestures: pinch, open palm, point, two fingers
 """
 
-import math
+import numpy as np
+
+# Numba JIT for the per-frame classifier; runs as plain Python if Numba is not installed
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator when Numba is unavailable"""
+        def decorator(func):
+            return func
+        return decorator
+
+# MediaPipe landmark indices
+THUMB_IP = 3
+THUMB_TIP = 4
+INDEX_MCP = 5
+INDEX_TIP = 8
+MIDDLE_TIP = 12
+
+# Tip / PIP joint pairs for index, middle, ring and pinky fingers
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+
+# Gesture ids returned by the compiled classifier
+GESTURE_NONE = 0
+GESTURE_POINT = 1
+GESTURE_PINCH = 2
+GESTURE_TWO_FINGERS = 3
+GESTURE_OPEN_PALM = 4
+GESTURE_TYPES = ('none', 'point', 'pinch', 'two_fingers', 'open_palm')
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _distance(landmarks, a, b):
+    """Euclidean distance between landmarks a and b"""
+    dx = landmarks[a, 0] - landmarks[b, 0]
+    dy = landmarks[a, 1] - landmarks[b, 1]
+    dz = landmarks[a, 2] - landmarks[b, 2]
+    return np.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _classify_landmarks(landmarks, pinch_threshold, thumb_up):
+    """
+    Classify gesture from a (21, 3) float32 landmark array
+    
+    Args:
+        landmarks: (21, 3) float32 landmark array
+        pinch_threshold: Normalized thumb-index distance below which a pinch is detected
+        thumb_up: Thumb state from the handedness-specialized entry point
+        
+    Returns:
+        Tuple of (gesture_id, values) where values is a float32 array of
+        [x, y, extra_a, extra_b, extended_count]:
+        point -> direction x/y, pinch -> distance, two_fingers -> distance
+    """
+    values = np.zeros(5, dtype=np.float32)
+    
+    # Other fingers: tip y above PIP y
+    index_up = landmarks[FINGER_TIPS[0], 1] < landmarks[FINGER_PIPS[0], 1]
+    middle_up = landmarks[FINGER_TIPS[1], 1] < landmarks[FINGER_PIPS[1], 1]
+    ring_up = landmarks[FINGER_TIPS[2], 1] < landmarks[FINGER_PIPS[2], 1]
+    pinky_up = landmarks[FINGER_TIPS[3], 1] < landmarks[FINGER_PIPS[3], 1]
+    
+    extended_count = 0
+    for up in (thumb_up, index_up, middle_up, ring_up, pinky_up):
+        if up:
+            extended_count += 1
+    values[4] = extended_count
+    
+    thumb_index_distance = _distance(landmarks, THUMB_TIP, INDEX_TIP)
+    
+    # GESTURE PRIORITY: Check point FIRST (more specific), then pinch
+    # This prevents pinch from triggering when user wants to point
+    
+    # GESTURE 1: POINT (only index finger up, not pinching)
+    if (index_up and not middle_up and not ring_up and not pinky_up and
+            thumb_index_distance >= pinch_threshold):
+        values[0] = landmarks[INDEX_TIP, 0]
+        values[1] = landmarks[INDEX_TIP, 1]
+        # Direction from MCP to tip
+        values[2] = landmarks[INDEX_TIP, 0] - landmarks[INDEX_MCP, 0]
+        values[3] = landmarks[INDEX_TIP, 1] - landmarks[INDEX_MCP, 1]
+        return GESTURE_POINT, values
+    
+    # GESTURE 2: PINCH (thumb + index finger close together)
+    if thumb_index_distance < pinch_threshold:
+        values[0] = (landmarks[THUMB_TIP, 0] + landmarks[INDEX_TIP, 0]) / 2
+        values[1] = (landmarks[THUMB_TIP, 1] + landmarks[INDEX_TIP, 1]) / 2
+        values[2] = thumb_index_distance
+        return GESTURE_PINCH, values
+    
+    # GESTURE 3: TWO FINGERS (index + middle up, others down)
+    if index_up and middle_up and not ring_up and not pinky_up:
+        values[0] = (landmarks[INDEX_TIP, 0] + landmarks[MIDDLE_TIP, 0]) / 2
+        values[1] = (landmarks[INDEX_TIP, 1] + landmarks[MIDDLE_TIP, 1]) / 2
+        values[2] = _distance(landmarks, INDEX_TIP, MIDDLE_TIP)
+        return GESTURE_TWO_FINGERS, values
+    
+    # GESTURE 4: OPEN PALM (4 or 5 fingers extended - robust for both hands)
+    if extended_count >= 4:
+        # Palm center from landmarks 0-4
+        for i in range(5):
+            values[0] += landmarks[i, 0]
+            values[1] += landmarks[i, 1]
+        values[0] /= 5
+        values[1] /= 5
+        return GESTURE_OPEN_PALM, values
+    
+    # No recognized gesture
+    return GESTURE_NONE, values
+
+
+# Handedness-specialized entry points: thumb direction is inlined instead of branched per frame.
+# Frames are mirrored (selfie view), so an extended right thumb points to smaller x.
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _classify_right_hand(landmarks, pinch_threshold):
+    """Classify a right hand: thumb is up if tip x < IP x"""
+    thumb_up = landmarks[THUMB_TIP, 0] < landmarks[THUMB_IP, 0]
+    return _classify_landmarks(landmarks, pinch_threshold, thumb_up)
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _classify_left_hand(landmarks, pinch_threshold):
+    """Classify a left hand: thumb is up if tip x > IP x"""
+    thumb_up = landmarks[THUMB_TIP, 0] > landmarks[THUMB_IP, 0]
+    return _classify_landmarks(landmarks, pinch_threshold, thumb_up)
 
 
 class GestureRecognizer:
@@ -23,13 +150,23 @@ class GestureRecognizer:
         self.min_confidence = 0.2  # Even lower for instant response
         self.confidence_increment = 0.15  # Faster confidence building
         self.confidence_decrement = 0.15  # Faster confidence decay
+        
+        # Classifier per handedness label, picked once per frame
+        self.classifiers = {
+            'Right': _classify_right_hand,
+            'Left': _classify_left_hand,
+        }
+        
+        # Warm up the JIT so the first tracked frame doesn't pay compile cost
+        for classify in self.classifiers.values():
+            classify(np.zeros((21, 3), dtype=np.float32), self.pinch_threshold)
     
     def recognize(self, hands_data):
         """
         Recognize gestures from hand landmarks
         
         Args:
-            hands_data: List of hand data dictionaries from HandTracker
+            hands_data: List of hand data dictionaries from HandTracker ('landmarks' is a (21, 3) array)
             
         Returns:
             Dictionary with gesture type and additional data
@@ -41,180 +178,71 @@ class GestureRecognizer:
         hand = hands_data[0]
         landmarks = hand['landmarks']
         
-        # Detect finger states
-        fingers_up = self._detect_fingers_up(landmarks)
-        
-        # Recognize gesture
-        gesture = self._classify_gesture(fingers_up, landmarks, hand)
+        # Recognize gesture (compiled hot path specialized for this hand)
+        classify = self.classifiers.get(hand['label'], _classify_right_hand)
+        gesture_id, values = classify(landmarks, self.pinch_threshold)
+        gesture = self._build_gesture(gesture_id, values)
         
         # Update confidence - faster response
-        if gesture and gesture['type'] == self.last_gesture:
+        current_type = gesture['type'] if gesture else None
+        if current_type == self.last_gesture:
             self.gesture_confidence = min(1.0, self.gesture_confidence + self.confidence_increment)
         else:
             self.gesture_confidence = max(0.0, self.gesture_confidence - self.confidence_decrement)
-            self.last_gesture = gesture['type'] if gesture else None
+        self.last_gesture = current_type
         
-        # Always return gesture (even with low confidence for better responsiveness)
-        if gesture and gesture.get('type') != 'none':
+        # Return gesture once confidence is above threshold (low threshold for responsiveness)
+        if current_type and current_type != 'none' and self.gesture_confidence >= self.min_confidence:
             gesture['confidence'] = self.gesture_confidence
-            # Return gesture if confidence is above threshold OR if it's a new gesture type
-            if self.gesture_confidence >= self.min_confidence or gesture['type'] != self.last_gesture:
-                return gesture
+            return gesture
         
         # Return 'none' gesture to indicate no gesture detected
         return {'type': 'none', 'confidence': 0}
     
-    def _detect_fingers_up(self, landmarks):
+    def _build_gesture(self, gesture_id, values):
         """
-        Detect which fingers are extended
+        Build the gesture dictionary from the compiled classifier output
         
         Args:
-            landmarks: List of landmark dictionaries
-            
-        Returns:
-            Dictionary with finger states (True = up, False = down)
-        """
-        fingers = {
-            'thumb': False,
-            'index': False,
-            'middle': False,
-            'ring': False,
-            'pinky': False
-        }
-        
-        # Thumb: Compare x-coordinate of tip (4) with IP joint (3)
-        # For right hand, thumb is up if tip x > IP x
-        # For left hand, thumb is up if tip x < IP x
-        if landmarks[4]['x'] > landmarks[3]['x']:
-            fingers['thumb'] = True
-        
-        # Index finger: Compare y-coordinate of tip (8) with PIP (6)
-        if landmarks[8]['y'] < landmarks[6]['y']:
-            fingers['index'] = True
-        
-        # Middle finger: Compare y-coordinate of tip (12) with PIP (10)
-        if landmarks[12]['y'] < landmarks[10]['y']:
-            fingers['middle'] = True
-        
-        # Ring finger: Compare y-coordinate of tip (16) with PIP (14)
-        if landmarks[16]['y'] < landmarks[14]['y']:
-            fingers['ring'] = True
-        
-        # Pinky: Compare y-coordinate of tip (20) with PIP (18)
-        if landmarks[20]['y'] < landmarks[18]['y']:
-            fingers['pinky'] = True
-        
-        return fingers
-    
-    def _classify_gesture(self, fingers_up, landmarks, hand):
-        """
-        Classify gesture based on finger states and landmark positions
-        
-        Args:
-            fingers_up: Dictionary of finger states
-            landmarks: List of landmark dictionaries
-            hand: Hand data dictionary
+            gesture_id: Gesture id from the compiled classifier
+            values: float32 array of [x, y, extra_a, extra_b, extended_count]
             
         Returns:
             Gesture dictionary with type and additional data
         """
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        wrist = landmarks[0]
-        
-        # Calculate distances
-        thumb_index_distance = self._calculate_distance(thumb_tip, index_tip)
-        
-        # Count extended fingers
-        extended_count = sum([
-            fingers_up['thumb'],
-            fingers_up['index'],
-            fingers_up['middle'],
-            fingers_up['ring'],
-            fingers_up['pinky']
-        ])
-        
-        # GESTURE PRIORITY: Check point FIRST (more specific), then pinch
-        # This prevents pinch from triggering when user wants to point
-        
-        # GESTURE 1: POINT (only index finger up) - Check FIRST for priority
-        if (fingers_up['index'] and 
-            not fingers_up['middle'] and 
-            not fingers_up['ring'] and 
-            not fingers_up['pinky'] and
-            thumb_index_distance >= self.pinch_threshold):  # Ensure not pinching
+        x, y, extra_a, extra_b, extended_count = values.tolist()
+        extended_count = int(extended_count)
+        
+        if gesture_id == GESTURE_POINT:
             return {
                 'type': 'point',
-                'position': {
-                    'x': index_tip['x'],
-                    'y': index_tip['y']
-                },
-                'direction': {
-                    'x': index_tip['x'] - landmarks[5]['x'],  # Direction from MCP to tip
-                    'y': index_tip['y'] - landmarks[5]['y']
-                }
+                'position': {'x': x, 'y': y},
+                'direction': {'x': extra_a, 'y': extra_b}
             }
         
-        # GESTURE 2: PINCH (thumb + index finger close together)
-        if thumb_index_distance < self.pinch_threshold:
+        if gesture_id == GESTURE_PINCH:
             return {
                 'type': 'pinch',
-                'distance': thumb_index_distance,
-                'position': {
-                    'x': (thumb_tip['x'] + index_tip['x']) / 2,
-                    'y': (thumb_tip['y'] + index_tip['y']) / 2
-                }
+                'distance': extra_a,
+                'position': {'x': x, 'y': y}
             }
         
-        # GESTURE 3: TWO FINGERS (index + middle up, others down)
-        if (fingers_up['index'] and 
-            fingers_up['middle'] and 
-            not fingers_up['ring'] and 
-            not fingers_up['pinky']):
+        if gesture_id == GESTURE_TWO_FINGERS:
             return {
                 'type': 'two_fingers',
-                'position': {
-                    'x': (index_tip['x'] + middle_tip['x']) / 2,
-                    'y': (index_tip['y'] + middle_tip['y']) / 2
-                },
-                'distance': self._calculate_distance(index_tip, middle_tip)
+                'position': {'x': x, 'y': y},
+                'distance': extra_a
             }
         
-        # GESTURE 4: OPEN PALM (4 or 5 fingers extended - robust for both hands)
-        if extended_count >= 4:
-            # Calculate palm center
-            palm_center_x = sum(lm['x'] for lm in landmarks[0:5]) / 5
-            palm_center_y = sum(lm['y'] for lm in landmarks[0:5]) / 5
-            
+        if gesture_id == GESTURE_OPEN_PALM:
             return {
                 'type': 'open_palm',
-                'position': {
-                    'x': palm_center_x,
-                    'y': palm_center_y
-                },
+                'position': {'x': x, 'y': y},
                 'fingers_extended': extended_count
             }
         
         # No recognized gesture
         return {
-            'type': 'none',
+            'type': GESTURE_TYPES[gesture_id],
             'extended_fingers': extended_count
         }
-    
-    def _calculate_distance(self, point1, point2):
-        """
-        Calculate Euclidean distance between two points
-        
-        Args:
-            point1: Dictionary with x, y, z coordinates
-            point2: Dictionary with x, y, z coordinates
-            
-        Returns:
-            Distance as float
-        """
-        dx = point1['x'] - point2['x']
-        dy = point1['y'] - point2['y']
-        dz = point1['z'] - point2['z']
-        return math.sqrt(dx*dx + dy*dy + dz*dz)
-
@@ -3,34 +3,114 @@ MediaPipe Hand Tracking Module
 Detects and tracks hand landmarks in real-time
 """
 
+import os
+import time
+import urllib.request
+
 import cv2
 import mediapipe as mp
 import numpy as np
+from mediapipe.tasks.python import BaseOptions
+from mediapipe.tasks.python.vision import HandLandmarker, HandLandmarkerOptions, RunningMode
+
+# MediaPipe hand model outputs 21 landmarks per hand
+NUM_LANDMARKS = 21
+
+# Landmarks are sent as int16 (value * LANDMARK_SCALE); 16384 keeps ~6e-5 precision
+# and headroom for coordinates slightly outside [0, 1] when the hand leaves the frame
+LANDMARK_SCALE = 16384
+
+# Hand skeleton connections (MediaPipe hand structure)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),  # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),  # Index
+    (0, 9), (9, 10), (10, 11), (11, 12),  # Middle
+    (0, 13), (13, 14), (14, 15), (15, 16),  # Ring
+    (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky
+    (5, 9), (9, 13), (13, 17),  # Palm
+)
+
+# MediaPipe Tasks hand landmarker model (downloaded on first run)
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'hand_landmarker.task')
+MODEL_URL = 'https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task'
+
+
+def ensure_model(model_path=MODEL_PATH):
+    """
+    Download the default hand landmarker model if it is not present yet
+    (custom model paths are used as-is)
+    
+    Args:
+        model_path: Local path of the .task model bundle
+        
+    Returns:
+        Path to the model file
+    """
+    if model_path == MODEL_PATH and not os.path.exists(model_path):
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        print(f"Downloading hand landmarker model to {model_path}...")
+        # Download to a temp file first so an interrupted download never leaves a corrupt model
+        partial_path = model_path + '.part'
+        urllib.request.urlretrieve(MODEL_URL, partial_path)
+        os.replace(partial_path, model_path)
+    return model_path
 
 
 class HandTracker:
-    """Hand tracking using MediaPipe Hands"""
+    """Hand tracking using the MediaPipe Tasks HandLandmarker"""
     
-    def __init__(self, model_complexity=0):
+    def __init__(self, model_path=MODEL_PATH, min_detection_confidence=0.4, min_tracking_confidence=0.3):
         """
-        Initialize MediaPipe Hands model
+        Initialize MediaPipe HandLandmarker (CPU delegate, XNNPACK-accelerated)
         
         Args:
-            model_complexity: 0=Lite (Fastest), 1=Full (Default)
-        """
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,  # Reduced to 1 hand for maximum speed
-            min_detection_confidence=0.5,  # Lower threshold for faster detection
-            min_tracking_confidence=0.5,
-            model_complexity=model_complexity  # Use Lite model by default
+            model_path: Path to the hand_landmarker.task model bundle
+            min_detection_confidence: Palm detection threshold (lower = fewer missed re-detections)
+            min_tracking_confidence: Threshold below which tracking falls back to palm detection
+                (kept below detection so stable hands stay on the cheap tracking path)
+        """
+        options = HandLandmarkerOptions(
+            base_options=BaseOptions(
+                model_asset_path=ensure_model(model_path),
+                delegate=BaseOptions.Delegate.CPU  # TFLite CPU path runs on XNNPACK
+            ),
+            # VIDEO mode tracks across frames synchronously; the stream pipeline already runs it off the event loop
+            running_mode=RunningMode.VIDEO,
+            num_hands=1,  # Reduced to 1 hand for maximum speed
+            min_hand_detection_confidence=min_detection_confidence,  # Lower threshold for faster detection
+            min_hand_presence_confidence=min_tracking_confidence,
+            min_tracking_confidence=min_tracking_confidence
         )
-        self.mp_drawing = mp.solutions.drawing_utils
+        self.landmarker = HandLandmarker.create_from_options(options)
+        
+        # VIDEO mode requires strictly increasing timestamps
+        self.last_timestamp_ms = -1
         
-        # Smoothing filter (moving average) - reduced for lower latency
-        self.landmark_history = []
-        self.history_size = 6  # Increased for 60 FPS (100ms window) for smoother cursor
+        # Reused RGB input buffer for process() (re-allocated only if the frame size changes)
+        self.rgb_buffer = None
+        
+        # Smoothing filter (One-Euro) - adapts cutoff to hand speed: smooth at rest, low lag when moving
+        self.min_cutoff = 1.0  # Hz, cutoff when the hand is still (jitter reduction)
+        self.beta = 4.0  # Cutoff increase per unit/s of landmark speed (lag reduction)
+        self.d_cutoff = 1.0  # Hz, cutoff for the speed estimate
+        self.filtered_landmarks = None
+        self.filtered_velocity = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.last_filter_time = 0.0
+        
+        # Frame skipping: run MediaPipe every Nth frame and extrapolate in between
+        # (constant velocity from the last two *detected* positions of the primary hand;
+        # predictions are never fed back, so a stopped hand extrapolates to a stop)
+        self.detection_interval = 2  # Detect at half framerate
+        self.extrapolation_confidence = 0.8  # Minimum handedness score to extrapolate
+        self.frames_since_detection = 0
+        self.detection_gap = 1  # Frames between the last two detections
+        self.last_raw = None
+        self.prev_raw = None
+        self.last_label = None
+        # HandLandmarker does not expose its hand presence score, so the Left/Right
+        # handedness score is used as a proxy: it drops when the hand is ambiguous,
+        # edge-on or partly out of frame, which is when extrapolation goes wrong
+        self.last_handedness_score = 0.0
     
     def process(self, frame):
         """
@@ -40,13 +120,32 @@ class HandTracker:
             frame: BGR image frame from OpenCV
             
         Returns:
-            MediaPipe results object
+            MediaPipe HandLandmarkerResult
         """
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.rgb_buffer is None or self.rgb_buffer.shape != frame.shape:
+            self.rgb_buffer = np.empty(frame.shape, dtype=np.uint8)
+        
+        # Convert BGR to RGB into the persistent buffer (no per-frame allocation)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        
+        return self.process_rgb(self.rgb_buffer)
+    
+    def process_rgb(self, rgb_frame):
+        """
+        Process an already RGB-ordered frame (skips the color conversion)
+        
+        Args:
+            rgb_frame: Contiguous RGB image array
+            
+        Returns:
+            MediaPipe HandLandmarkerResult
+        """
+        timestamp_ms = max(int(time.monotonic() * 1000), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
         
         # Process with MediaPipe
-        results = self.hands.process(rgb_frame)
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        results = self.landmarker.detect_for_video(image, timestamp_ms)
         
         return results
     
@@ -55,81 +154,143 @@ class HandTracker:
         Extract and smooth hand landmarks
         
         Args:
-            results: MediaPipe results object
+            results: MediaPipe HandLandmarkerResult
             
         Returns:
-            List of hand landmark dictionaries with smoothed coordinates
+            List of hand data dictionaries; 'landmarks' is a smoothed (21, 3) float32 array
         """
-        if not results.multi_hand_landmarks:
+        detection_gap = self.frames_since_detection + 1
+        self.frames_since_detection = 0
+        
+        if not results.hand_landmarks:
+            # Hand lost - don't extrapolate or filter from stale positions
+            self.last_raw = None
+            self.prev_raw = None
+            self.last_handedness_score = 0.0
+            self.filtered_landmarks = None
             return None
         
         hands_data = []
         
         for hand_landmarks, handedness in zip(
-            results.multi_hand_landmarks,
-            results.multi_handedness
+            results.hand_landmarks,
+            results.handedness
         ):
-            # Extract landmarks
-            landmarks = []
-            for landmark in hand_landmarks.landmark:
-                landmarks.append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z
-                })
+            # Extract landmarks into a single (21, 3) array
+            landmarks = np.array(
+                [[landmark.x, landmark.y, landmark.z] for landmark in hand_landmarks],
+                dtype=np.float32
+            )
             
             # Apply smoothing filter
             smoothed_landmarks = self._smooth_landmarks(landmarks)
             
             # Get hand label (Left/Right)
-            hand_label = handedness.classification[0].label
+            hand_label = handedness[0].category_name
+            
+            # Remember raw positions of the primary hand for extrapolation
+            if not hands_data:
+                self.prev_raw = self.last_raw
+                self.last_raw = landmarks
+                self.detection_gap = detection_gap
+                self.last_label = hand_label
+                self.last_handedness_score = handedness[0].score
             
             hands_data.append({
                 'landmarks': smoothed_landmarks,
                 'label': hand_label,
-                'wrist': smoothed_landmarks[0],  # Wrist is landmark 0
-                'index_tip': smoothed_landmarks[8],  # Index finger tip
-                'thumb_tip': smoothed_landmarks[4],  # Thumb tip
-                'middle_tip': smoothed_landmarks[12],  # Middle finger tip
             })
         
         return hands_data
     
-    def _smooth_landmarks(self, landmarks):
+    def should_skip_detection(self):
+        """
+        Check whether this frame can be extrapolated instead of running MediaPipe
+        
+        Returns:
+            True if detection ran recently, the handedness score (tracking quality
+            proxy) is high enough and two previous detections are available
+        """
+        return (self.frames_since_detection < self.detection_interval - 1 and
+                self.last_raw is not None and
+                self.prev_raw is not None and
+                self.last_handedness_score >= self.extrapolation_confidence)
+    
+    def extrapolate_landmarks(self):
+        """
+        Predict landmarks for a skipped frame using constant velocity
+        
+        Returns:
+            List with one hand data dictionary (same shape as get_landmarks)
+        """
+        self.frames_since_detection += 1
+        
+        # Per-frame velocity between the last two detections, projected forward
+        velocity = (self.last_raw - self.prev_raw) / self.detection_gap
+        predicted = self.last_raw + velocity * self.frames_since_detection
+        
+        return [{
+            'landmarks': self._smooth_landmarks(predicted),
+            'label': self.last_label,
+        }]
+    
+    @staticmethod
+    def serialize(hands_data):
         """
-        Apply moving average filter to reduce jitter
+        Quantize hand data into a compact payload for emitting to the client
         
         Args:
-            landmarks: Current frame landmarks
+            hands_data: List of hand data dictionaries from get_landmarks
             
         Returns:
-            Smoothed landmarks
+            Tuple of (labels, landmark_bytes): hand labels in order, and every hand's
+            landmarks back to back as little-endian int16 bytes (x, y, z per landmark,
+            scaled by LANDMARK_SCALE)
         """
-        # Add current landmarks to history
-        self.landmark_history.append(landmarks)
+        if not hands_data:
+            return [], b''
         
-        # Keep only recent history
-        if len(self.landmark_history) > self.history_size:
-            self.landmark_history.pop(0)
+        landmarks = np.stack([hand['landmarks'] for hand in hands_data])
+        quantized = np.clip(np.rint(landmarks * LANDMARK_SCALE), -32768, 32767)
         
-        # If not enough history, return current landmarks
-        if len(self.landmark_history) < 2:
-            return landmarks
+        return [hand['label'] for hand in hands_data], quantized.astype('<i2').tobytes()
+    
+    @staticmethod
+    def _smoothing_factor(cutoff, dt):
+        """Exponential smoothing factor for a low-pass filter with the given cutoff (Hz)"""
+        return 1.0 / (1.0 + 1.0 / (2 * np.pi * cutoff * dt))
+    
+    def _smooth_landmarks(self, landmarks):
+        """
+        Apply One-Euro filter to reduce jitter (vectorized over all landmarks)
         
-        # Calculate moving average
-        smoothed = []
-        for i in range(len(landmarks)):
-            avg_x = sum(h[i]['x'] for h in self.landmark_history) / len(self.landmark_history)
-            avg_y = sum(h[i]['y'] for h in self.landmark_history) / len(self.landmark_history)
-            avg_z = sum(h[i]['z'] for h in self.landmark_history) / len(self.landmark_history)
+        Args:
+            landmarks: Current frame landmarks as a (21, 3) array
             
-            smoothed.append({
-                'x': avg_x,
-                'y': avg_y,
-                'z': avg_z
-            })
+        Returns:
+            Smoothed landmarks as a (21, 3) array
+        """
+        now = time.monotonic()
+        
+        # First frame of a new track: nothing to filter against yet
+        if self.filtered_landmarks is None:
+            self.filtered_landmarks = landmarks.copy()
+            self.filtered_velocity.fill(0)
+            self.last_filter_time = now
+            return landmarks
         
-        return smoothed
+        dt = max(now - self.last_filter_time, 1e-3)
+        self.last_filter_time = now
+        
+        # Low-pass filtered speed estimate
+        velocity = (landmarks - self.filtered_landmarks) / dt
+        self.filtered_velocity += self._smoothing_factor(self.d_cutoff, dt) * (velocity - self.filtered_velocity)
+        
+        # Speed-adaptive cutoff, then low-pass the positions
+        cutoff = self.min_cutoff + self.beta * np.abs(self.filtered_velocity)
+        self.filtered_landmarks += self._smoothing_factor(cutoff, dt) * (landmarks - self.filtered_landmarks)
+        
+        return self.filtered_landmarks.copy()
     
     def draw_landmarks(self, frame, results):
         """
@@ -137,26 +298,26 @@ class HandTracker:
         
         Args:
             frame: BGR image frame
-            results: MediaPipe results object
+            results: MediaPipe HandLandmarkerResult
             
         Returns:
             Frame with drawn landmarks
         """
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw landmarks
-                self.mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    self.mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-                )
+        height, width = frame.shape[:2]
+        for hand_landmarks in results.hand_landmarks:
+            points = [(int(landmark.x * width), int(landmark.y * height)) for landmark in hand_landmarks]
+            
+            # Draw connections
+            for start, end in HAND_CONNECTIONS:
+                cv2.line(frame, points[start], points[end], (0, 0, 255), 2)
+            
+            # Draw landmarks
+            for point in points:
+                cv2.circle(frame, point, 2, (0, 255, 0), 2)
         
         return frame
     
     def cleanup(self):
         """Release resources"""
-        if self.hands:
-            self.hands.close()
-
+        if self.landmarker:
+            self.landmarker.close()
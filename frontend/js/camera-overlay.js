@@ -70,9 +70,10 @@ class CameraOverlay {
     
     /**
      * Update camera video frame - ULTRA OPTIMIZED with frame queue
+     * @param {Uint8Array} frameData - Raw JPEG bytes sliced from the binary frame payload
      */
     updateFrame(frameData) {
-        if (!frameData || !frameData.startsWith('data:image')) {
+        if (!frameData || !frameData.byteLength) {
             return;
         }
         if (!this.previewContext) {
@@ -113,24 +114,25 @@ class CameraOverlay {
      */
     async decodeFrameAsync(frameData) {
         try {
+            const blob = new Blob([frameData], { type: 'image/jpeg' });
             if (typeof createImageBitmap !== 'undefined') {
-                // Use fetch with AbortController for timeout
-                const controller = new AbortController();
-                const timeout = setTimeout(() => controller.abort(), 100); // 100ms timeout
-                
-                const response = await fetch(frameData, { signal: controller.signal });
-                clearTimeout(timeout);
-                
-                const blob = await response.blob();
+                // Decode JPEG bytes directly (no data URL / base64 round trip)
                 const bitmap = await createImageBitmap(blob);
                 return bitmap;
             } else {
                 // Fallback: use Image (slower but compatible)
                 return new Promise((resolve, reject) => {
                     const img = new Image();
-                    img.onload = () => resolve(img);
-                    img.onerror = reject;
-                    img.src = frameData;
+                    const url = URL.createObjectURL(blob);
+                    img.onload = () => {
+                        URL.revokeObjectURL(url);
+                        resolve(img);
+                    };
+                    img.onerror = (error) => {
+                        URL.revokeObjectURL(url);
+                        reject(error);
+                    };
+                    img.src = url;
                 });
             }
         } catch (error) {
@@ -19,6 +19,10 @@ const AppState = {
     targetFPS: 60  // Default target FPS
 };
 
+// Server sends landmarks as int16 (value * LANDMARK_SCALE), see backend/hand_tracker.py
+const LANDMARK_SCALE = 16384;
+const LANDMARKS_PER_HAND = 21;
+
 // Initialize application
 document.addEventListener('DOMContentLoaded', () => {
     initializeApp();
@@ -123,13 +127,39 @@ function setupARListeners() {
     });
 }
 
+/**
+ * Decode a frame payload (uint16 hand count, int16 landmarks, then the preview JPEG)
+ * into hand objects with {x, y, z} landmarks and a JPEG view (null if no preview)
+ */
+function decodeFramePayload(payload, labels) {
+    const handCount = new DataView(payload).getUint16(0, true);
+    const values = new Int16Array(payload, 2, handCount * LANDMARKS_PER_HAND * 3);
+    const hands = new Array(handCount);
+    for (let h = 0; h < handCount; h++) {
+        const landmarks = new Array(LANDMARKS_PER_HAND);
+        for (let i = 0; i < LANDMARKS_PER_HAND; i++) {
+            const offset = (h * LANDMARKS_PER_HAND + i) * 3;
+            landmarks[i] = {
+                x: values[offset] / LANDMARK_SCALE,
+                y: values[offset + 1] / LANDMARK_SCALE,
+                z: values[offset + 2] / LANDMARK_SCALE
+            };
+        }
+        hands[h] = { label: labels[h], landmarks: landmarks };
+    }
+
+    const jpegOffset = 2 + values.byteLength;
+    const frame = payload.byteLength > jpegOffset ? new Uint8Array(payload, jpegOffset) : null;
+    return { landmarks: hands, frame: frame };
+}
+
 /**
  * Initialize WebSocket connection to backend
  */
 function initializeWebSocket() {
     return new Promise((resolve, reject) => {
         try {
-            // Connect to Flask-SocketIO server - OPTIMIZED
+            // Connect to Socket.IO server - OPTIMIZED
             AppState.socket = io('http://localhost:5000', {
                 transports: ['websocket'],  // WebSocket only for better performance
                 reconnection: true,
@@ -155,7 +185,14 @@ function initializeWebSocket() {
             });
 
             // Receive camera frames and gesture data - ULTRA OPTIMIZED
-            AppState.socket.on('camera_frame', (data) => {
+            const handleCameraFrame = (data) => {
+                // Landmarks and preview JPEG arrive together in one binary payload
+                if (data.payload) {
+                    const decoded = decodeFramePayload(data.payload, data.hands);
+                    data.landmarks = decoded.landmarks;
+                    data.frame = decoded.frame;
+                }
+
                 // Update camera preview (async, non-blocking)
                 if (AppState.cameraOverlay && data.frame) {
                     // Don't throttle - let the overlay's internal queue handle it
@@ -224,13 +261,27 @@ function initializeWebSocket() {
                         AppState.gestureController.handsDetected = false;
                     }
                 }
-            });
+            };
 
             // Performance metrics
-            AppState.socket.on('performance', (data) => {
+            const handlePerformance = (data) => {
                 AppState.currentFPS = data.fps;
                 AppState.currentLatency = data.latency;
                 updatePerformanceUI(data.fps, data.latency);
+            };
+
+            // Server sends one 'batch' event per frame (the 1 Hz performance message rides along)
+            const batchHandlers = {
+                camera_frame: handleCameraFrame,
+                performance: handlePerformance
+            };
+            AppState.socket.on('batch', (messages) => {
+                messages.forEach(({ event, data }) => {
+                    const handler = batchHandlers[event];
+                    if (handler) {
+                        handler(data);
+                    }
+                });
             });
 
             // Error handling
@@ -19,7 +19,7 @@ if exist "venv\Scripts\activate.bat" (
 )
 
 REM Check if requirements are installed
-py -c "import flask" 2>nul
+py -c "import socketio, uvicorn" 2>nul
 if errorlevel 1 (
     echo.
     echo Dependencies not installed. Installing...
@@ -27,7 +27,7 @@ if errorlevel 1 (
     echo.
 )
 
-echo Starting Flask server...
+echo Starting server...
 echo Open http://localhost:5000 in your browser
 echo Press Ctrl+C to stop the server
 echo.
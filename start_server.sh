@@ -20,7 +20,7 @@ else
 fi
 
 # Check if requirements are installed
-python3 -c "import flask" 2>/dev/null
+python3 -c "import socketio, uvicorn" 2>/dev/null
 if [ $? -ne 0 ]; then
     echo ""
     echo "Dependencies not installed. Installing..."
@@ -28,7 +28,7 @@ if [ $? -ne 0 ]; then
     echo ""
 fi
 
-echo "Starting Flask server..."
+echo "Starting server..."
 echo "Open http://localhost:5000 in your browser"
 echo "Press Ctrl+C to stop the server"
 echo ""